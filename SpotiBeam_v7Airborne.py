@@ -8,17 +8,29 @@ SpotiBeam_v7Ultra GodMode - V7-Airborne patch (Folder & TXT fixes)
 - Errors folder next to Tracks/Albums/Playlists for single-track failures
 - Playlist/Album keep their own failed_tracks.txt & sources_used.txt (one file per playlist)
 - Tracks keep centralized tracks/sources_used.txt and Errors/failed_tracks.txt
+- Daemon mode (--daemon): long-running local HTTP API sharing one warm engine, meta cache & worker pool
+- Distributed mode (--enqueue / --worker): SQLite work queue on a shared mount, leased track items,
+  per-worker staging, exactly-once commits into the shared SpotiBeam_Downloads tree
 All previous features preserved: SpotDL fallback, yt-dlp rescue, lyric handling, memes, etc.
 """
 
 import os
 import re
 import json
+import uuid
 import shutil
+import argparse
+import threading
+import queue
+import collections
+import socket
+import sqlite3
 import subprocess
 import random
 import time
+from contextlib import contextmanager
 from datetime import datetime,timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 # colorama
 try:
@@ -127,26 +139,67 @@ def check_dependencies():
 # Engine
 # -------------------------
 class SpotiBeam:
-    def __init__(self):
-        self.base = "SpotiBeam_Downloads"
+    META_TTL = 15 * 60       # seconds a spotdl meta result stays fresh
+    META_CACHE_MAX = 1024    # oldest entries are evicted past this
+
+    def __init__(self, base="SpotiBeam_Downloads"):
+        self.base = base
         # parent folders now: Tracks, Albums, Playlists, Errors
         self.tracks_folder = os.path.join(self.base, "Tracks")
         self.albums_folder = os.path.join(self.base, "Albums")
         self.playlists_folder = os.path.join(self.base, "Playlists")
         self.errors_folder = os.path.join(self.base, "Errors")
+        self.prepare_dirs()
+        # spotdl meta results, kept warm across downloads (daemon mode reuses one engine)
+        self._meta_cache = collections.OrderedDict()
+        self._meta_lock = threading.Lock()
+
+    def prepare_dirs(self):
         for p in (self.tracks_folder, self.albums_folder, self.playlists_folder, self.errors_folder,
                   os.path.join(self.tracks_folder, "Lyrics")):
             os.makedirs(p, exist_ok=True)
 
+    # spotdl meta (cached for META_TTL; failures are not cached so they get retried next time)
+    # fresh=True skips the cache lookup, e.g. playlist/album track lists that may have grown
+    def spotdl_meta(self, link, fresh=False):
+        with self._meta_lock:
+            hit = self._meta_cache.get(link)
+            if hit and not fresh and time.time() - hit[0] < self.META_TTL:
+                self._meta_cache.move_to_end(link)
+                return hit[1]
+        out = subprocess.run(["spotdl", "meta", link], capture_output=True, text=True, check=True)
+        meta = json.loads(out.stdout.strip())
+        with self._meta_lock:
+            self._meta_cache[link] = (time.time(), meta)
+            self._meta_cache.move_to_end(link)
+            while len(self._meta_cache) > self.META_CACHE_MAX:
+                self._meta_cache.popitem(last=False)
+        return meta
+
     # get spotify name (meta)
     def get_spotify_name(self, link):
         try:
-            out = subprocess.run(["spotdl", "meta", link], capture_output=True, text=True, check=True)
-            meta = json.loads(out.stdout.strip())
+            meta = self.spotdl_meta(link)
             return safe_name(meta.get("name", link))
         except Exception:
             return safe_name(link)
 
+    # playlist/album spotify link -> list of track urls (anything else -> [link_or_query])
+    # strict=True raises instead of falling back to [link_or_query] when the link can't be expanded
+    def expand_tracks(self, link_or_query, mode, strict=False):
+        if mode in ("playlist", "album") and link_or_query.startswith("http") and "spotify" in link_or_query:
+            try:
+                meta = self.spotdl_meta(link_or_query, fresh=True)
+                track_list = [t.get("url") for t in meta.get("tracks", []) if t.get("url")]
+                if track_list:
+                    return track_list
+                if strict:
+                    raise ValueError("spotdl meta returned no tracks")
+            except Exception:
+                if strict:
+                    raise
+        return [link_or_query]
+
     # route folder: Tracks (single-track) -> central Tracks folder
     # album/playlist -> Album/<album_name> or Playlists/<playlist_name>
     def route_folder(self, mode, link_or_query):
@@ -184,8 +237,7 @@ class SpotiBeam:
     # expected filename using spotdl meta (for skip-check)
     def expected_filename_for(self, track):
         try:
-            out = subprocess.run(["spotdl", "meta", track], capture_output=True, text=True, check=True)
-            meta = json.loads(out.stdout.strip())
+            meta = self.spotdl_meta(track)
             if meta.get("name") and meta.get("artists"):
                 return safe_name(f"{meta['artists'][0]} - {meta['name']}.mp3")
         except Exception:
@@ -231,7 +283,14 @@ class SpotiBeam:
             return None
 
     # main download (synchronous)
-    def download(self, link_or_query, mode):
+    def download(self, link_or_query, mode, progress=None, should_stop=None, retry_failed=True):
+        """
+        retry_failed: when False, never swap link_or_query for the items in failed_tracks.txt
+        progress: optional callback(idx, total, track, status) - status is
+                  'downloading', 'skipped', 'downloaded' or 'failed'
+        should_stop: optional callable; checked before each track, stops early when True
+        Returns: summary dict (folder, downloaded, skipped, failed, stopped)
+        """
         folder = self.route_folder(mode, link_or_query)
         os.makedirs(folder, exist_ok=True)
         print(Fore.CYAN + f"\n🎯 Target folder: {folder}")
@@ -249,17 +308,10 @@ class SpotiBeam:
 
         # build track list (playlist/album meta) or single-item list
         if mode in ("playlist", "album") and link_or_query.startswith("http") and "spotify" in link_or_query:
-            try:
-                out = subprocess.run(["spotdl", "meta", link_or_query], capture_output=True, text=True, check=True)
-                meta = json.loads(out.stdout.strip())
-                track_list = [t.get("url") for t in meta.get("tracks", []) if t.get("url")]
-                if not track_list:
-                    track_list = [link_or_query]
-            except Exception:
-                track_list = [link_or_query]
+            track_list = self.expand_tracks(link_or_query, mode)
         else:
             # If failed_tracks.txt exists (retry), prefer it for this folder/mode
-            if os.path.exists(failed_file):
+            if retry_failed and os.path.exists(failed_file):
                 with open(failed_file, "r", encoding="utf-8") as fh:
                     retry_items = [line.strip() for line in fh if line.strip()]
                 if retry_items:
@@ -271,6 +323,14 @@ class SpotiBeam:
                 track_list = [link_or_query]
 
         failed_tracks, skipped, downloaded = [], [], []
+        stopped = False
+
+        def report(idx, track, status):
+            if progress:
+                try:
+                    progress(idx, len(track_list), track, status)
+                except Exception:
+                    pass
 
         def log_source(track, source, note=""):
             try:
@@ -282,7 +342,12 @@ class SpotiBeam:
 
         # iterate synchronously
         for idx, track in enumerate(track_list, start=1):
+            if should_stop and should_stop():
+                print(Fore.YELLOW + f"\n🛑 Stop requested, leaving {len(track_list) - idx + 1} tracks untouched.")
+                stopped = True
+                break
             print(Fore.MAGENTA + f"\n🎵 Downloading [{idx}/{len(track_list)}] {track}")
+            report(idx, track, "downloading")
 
             expected_name = self.expected_filename_for(track)
 
@@ -293,6 +358,7 @@ class SpotiBeam:
                     print(Fore.GREEN + "   ✅ Already downloaded, skipping.")
                     skipped.append(track)
                     log_source(track, "skipped")
+                    report(idx, track, "skipped")
                     continue
 
             # Try fallback sources
@@ -406,10 +472,14 @@ class SpotiBeam:
                 print(Fore.RED + f"   ❌ All sources failed for track: {track}")
                 failed_tracks.append(track)
                 log_source(track, "failed")
+                report(idx, track, "failed")
+            else:
+                report(idx, track, "downloaded")
 
         # done iterating tracks
 
         # write failed file (playlist/album) or append to Errors/failed_tracks.txt (tracks)
+        # (a stopped playlist/album never tried most tracks, so its existing failed file is left alone)
         if mode == "track":
             if failed_tracks:
                 try:
@@ -418,7 +488,7 @@ class SpotiBeam:
                             fh.write(f"{datetime.now(timezone.utc).isoformat()} || {t}\n")
                 except Exception:
                     pass
-        else:
+        elif not stopped:
             if failed_tracks:
                 try:
                     with open(failed_file, "w", encoding="utf-8") as fh:
@@ -450,10 +520,778 @@ class SpotiBeam:
         else:
             print(Fore.GREEN + "🎉 All tracks complete — OverLord approves.")
 
+        return {
+            "folder": folder,
+            "downloaded": downloaded,
+            "skipped": skipped,
+            "failed": failed_tracks,
+            "stopped": stopped,
+        }
+
+# -------------------------
+# Daemon (job scheduler + local HTTP API)
+# -------------------------
+JOB_MODES = ("playlist", "album", "track")
+
+class JobScheduler:
+    """
+    Runs submitted jobs on a fixed pool of worker threads that all share one warm engine.
+    Jobs targeting the same folder run one at a time (the engine validates downloads by
+    looking at the newest mp3 in the folder, so two jobs must never write into it together).
+    Finished jobs are forgotten after `retention` seconds, and only the newest `keep_finished` are kept.
+    """
+    def __init__(self, engine, workers=2, keep_finished=200, retention=3600):
+        self.engine = engine
+        self.keep_finished = keep_finished
+        self.retention = retention
+        self.jobs = {}
+        self._cancel = {}
+        self._finished_at = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._folder_locks = {}
+        self._queue = queue.Queue()
+        self._threads = []
+        for i in range(max(1, workers)):
+            t = threading.Thread(target=self._worker, name=f"spotibeam-worker-{i + 1}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _now(self):
+        return datetime.now(timezone.utc).isoformat()
+
+    def _snapshot(self, job):
+        snap = dict(job)
+        snap["progress"] = dict(job["progress"])
+        return snap
+
+    # caller holds self._lock
+    def _finish(self, job, status):
+        job["status"] = status
+        job["finished"] = self._now()
+        self._finished_at[job["id"]] = time.time()
+
+    # caller holds self._lock
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        while self._finished_at:
+            job_id, at = next(iter(self._finished_at.items()))
+            if at >= cutoff and len(self._finished_at) <= self.keep_finished:
+                break
+            self._finished_at.popitem(last=False)
+            self.jobs.pop(job_id, None)
+            self._cancel.pop(job_id, None)
+
+    def submit(self, link, mode):
+        if mode not in JOB_MODES:
+            raise ValueError(f"mode must be one of {', '.join(JOB_MODES)}")
+        if not isinstance(link, str) or not link.strip():
+            raise ValueError("link must be a non-empty string")
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "id": job_id,
+            "link": link.strip(),
+            "mode": mode,
+            "status": "queued",
+            "submitted": self._now(),
+            "started": None,
+            "finished": None,
+            "folder": None,
+            "progress": {"current": 0, "total": 0, "track": None,
+                         "downloaded": 0, "skipped": 0, "failed": 0},
+            "error": None,
+        }
+        with self._lock:
+            self._prune()
+            self.jobs[job_id] = job
+            self._cancel[job_id] = threading.Event()
+            snap = self._snapshot(job)
+        self._queue.put(job_id)
+        return snap
+
+    def get(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return self._snapshot(job) if job else None
+
+    def list(self):
+        with self._lock:
+            self._prune()
+            return [self._snapshot(j) for j in self.jobs.values()]
+
+    def cancel(self, job_id):
+        """Queued jobs are cancelled right away; running jobs stop before their next track."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return None
+            if job["status"] in ("queued", "running"):
+                self._cancel[job_id].set()
+                if job["status"] == "queued":
+                    self._finish(job, "cancelled")
+                else:
+                    job["status"] = "cancelling"
+            return self._snapshot(job)
+
+    def cancel_all(self):
+        with self._lock:
+            ids = list(self.jobs)
+        for job_id in ids:
+            self.cancel(job_id)
+
+    def _folder_lock(self, folder):
+        with self._lock:
+            return self._folder_locks.setdefault(os.path.abspath(folder), threading.Lock())
+
+    def _worker(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                return  # cancelled (and maybe already pruned) before a worker got to it
+            stop = self._cancel[job_id]
+        link, mode = job["link"], job["mode"]
+
+        def progress(idx, total, track, status):
+            with self._lock:
+                p = job["progress"]
+                p["current"], p["total"], p["track"] = idx, total, track
+                if status in ("downloaded", "skipped", "failed"):
+                    p[status] += 1
+
+        try:
+            folder = self.engine.route_folder(mode, link)
+            with self._folder_lock(folder):
+                with self._lock:
+                    if stop.is_set():
+                        if job["status"] != "cancelled":
+                            self._finish(job, "cancelled")
+                        return
+                    job["status"] = "running"
+                    job["started"] = self._now()
+                    job["folder"] = folder
+                # jobs always run the link they were submitted with, never the failed_tracks.txt replay
+                summary = self.engine.download(link, mode, progress=progress, should_stop=stop.is_set,
+                                               retry_failed=False)
+            with self._lock:
+                if summary["stopped"]:
+                    self._finish(job, "cancelled")
+                elif summary["failed"] and not (summary["downloaded"] or summary["skipped"]):
+                    self._finish(job, "failed")
+                else:
+                    self._finish(job, "done")
+        except Exception as e:
+            with self._lock:
+                job["error"] = str(e)
+                self._finish(job, "failed")
+            print(Fore.RED + f"❌ Job {job_id} crashed: {e}")
+
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    """
+    GET    /health                -> {"status": "ok"}
+    GET    /jobs                  -> list of jobs
+    GET    /jobs/<id>             -> one job (status + progress)
+    POST   /jobs                  -> submit {"link": ..., "mode": "playlist|album|track"} (or a list of those)
+    DELETE /jobs/<id>             -> cancel
+    POST   /jobs/<id>/cancel      -> cancel
+    Every POST must be sent as Content-Type: application/json (415 otherwise).
+    """
+    server_version = "SpotiBeamDaemon/7"
+
+    def _send(self, code, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _parts(self):
+        return [p for p in self.path.split("?", 1)[0].split("/") if p]
+
+    def _cancel(self, job_id):
+        job = self.server.scheduler.cancel(job_id)
+        if job is None:
+            self._send(404, {"error": f"no such job: {job_id}"})
+        else:
+            self._send(200, job)
+
+    def do_GET(self):
+        parts = self._parts()
+        scheduler = self.server.scheduler
+        if parts == ["health"]:
+            self._send(200, {"status": "ok"})
+        elif parts == ["jobs"]:
+            self._send(200, scheduler.list())
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = scheduler.get(parts[1])
+            if job is None:
+                self._send(404, {"error": f"no such job: {parts[1]}"})
+            else:
+                self._send(200, job)
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        parts = self._parts()
+        # JSON only: a non-"simple" content type makes browsers send a CORS preflight first,
+        # so a random web page can't queue or cancel jobs on this local port
+        content_type = (self.headers.get("Content-Type") or "").split(";", 1)[0].strip().lower()
+        if content_type != "application/json":
+            self._send(415, {"error": "Content-Type must be application/json"})
+            return
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+            self._cancel(parts[1])
+            return
+        if parts != ["jobs"]:
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError("negative Content-Length")
+            payload = json.loads(self.rfile.read(length).decode("utf-8") or "null")
+        except Exception:
+            self._send(400, {"error": "body must be JSON"})
+            return
+        items = payload if isinstance(payload, list) else [payload]
+        if not items or not all(isinstance(i, dict) for i in items):
+            self._send(400, {"error": "expected a job object or a list of job objects"})
+            return
+        # validate everything first so a bad batch queues nothing
+        for item in items:
+            if item.get("mode") not in JOB_MODES or not isinstance(item.get("link"), str) or not item["link"].strip():
+                self._send(400, {"error": f"invalid job {item!r}: need 'link' and 'mode' in {JOB_MODES}"})
+                return
+        jobs = [self.server.scheduler.submit(i["link"], i["mode"]) for i in items]
+        self._send(202, jobs if isinstance(payload, list) else jobs[0])
+
+    def do_DELETE(self):
+        parts = self._parts()
+        if len(parts) == 2 and parts[0] == "jobs":
+            self._cancel(parts[1])
+        else:
+            self._send(404, {"error": "not found"})
+
+    def log_message(self, fmt, *args):
+        print(Fore.BLUE + f"🌐 {self.address_string()} - {fmt % args}")
+
+
+def run_daemon(host="127.0.0.1", port=8765, workers=2, base="SpotiBeam_Downloads"):
+    print_banner()
+    check_dependencies()  # once, not per job
+    engine = SpotiBeam(base=base)
+    scheduler = JobScheduler(engine, workers=workers)
+    server = ThreadingHTTPServer((host, port), DaemonHandler)
+    server.daemon_threads = True
+    server.scheduler = scheduler
+    print(Fore.GREEN + f"📡 SpotiBeam daemon listening on http://{host}:{port} with {workers} worker(s). Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(Fore.CYAN + "\n🛑 Shutting down daemon, cancelling queued/running jobs...")
+    finally:
+        scheduler.cancel_all()
+        server.server_close()
+
+# -------------------------
+# Distributed mode (shared SQLite work queue)
+# -------------------------
+class WorkQueue:
+    """
+    Track-level work items in one SQLite file that the coordinator and every worker can reach
+    (e.g. on the shared mount). Workers lease an item for `lease_seconds` and keep renewing it;
+    a lease that stops being renewed expires and the item becomes leasable again, so work held
+    by a crashed worker gets picked up by someone else. An item is marked done only while the
+    worker still holds the lease (token check under SQLite's write lock), so it is done once;
+    QueueWorker publishes under deterministic names, so a crash-retry overwrites, never duplicates.
+    Note: keep the default rollback journal - WAL mode does not work on network filesystems.
+    """
+    def __init__(self, path, lease_seconds=600, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._tx() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source TEXT NOT NULL,
+                    mode TEXT NOT NULL,
+                    dest TEXT NOT NULL,
+                    track TEXT NOT NULL,
+                    state TEXT NOT NULL DEFAULT 'queued',
+                    worker TEXT,
+                    lease_token TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    files TEXT,
+                    final_name TEXT,
+                    error TEXT,
+                    updated REAL,
+                    UNIQUE (dest, track)
+                )""")
+            # queues created before final_name existed
+            if "final_name" not in [r["name"] for r in db.execute("PRAGMA table_info(items)")]:
+                db.execute("ALTER TABLE items ADD COLUMN final_name TEXT")
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return db
+
+    # one write transaction; BEGIN IMMEDIATE takes the write lock up front
+    @contextmanager
+    def _tx(self):
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            yield db
+            db.execute("COMMIT")
+        except Exception:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+    def enqueue(self, source, mode, dest, tracks):
+        """Add track items (dest is relative to the downloads base). Re-enqueueing retries failed items."""
+        added = 0
+        now = time.time()
+        with self._tx() as db:
+            for track in tracks:
+                cur = db.execute(
+                    "INSERT OR IGNORE INTO items (source, mode, dest, track, updated) VALUES (?, ?, ?, ?, ?)",
+                    (source, mode, dest, track, now))
+                if cur.rowcount == 0:
+                    cur = db.execute(
+                        "UPDATE items SET state = 'queued', attempts = 0, error = NULL, updated = ? "
+                        "WHERE dest = ? AND track = ? AND state = 'failed'", (now, dest, track))
+                added += cur.rowcount
+        return added
+
+    def lease(self, worker, on_give_up=None):
+        """
+        Lease the next queued (or expired) item. Expired items that already used up their
+        attempts are marked failed instead (on_give_up(item) runs inside that transaction).
+        Returns: item dict (with its lease_token) or None
+        """
+        now = time.time()
+        with self._tx() as db:
+            while True:
+                row = db.execute(
+                    "SELECT * FROM items WHERE state = 'queued' OR (state = 'leased' AND lease_expires < ?) "
+                    "ORDER BY id LIMIT 1", (now,)).fetchone()
+                if row is None:
+                    return None
+                if row["state"] == "leased" and row["attempts"] >= self.max_attempts:
+                    self._give_up(on_give_up, dict(row))
+                    db.execute(
+                        "UPDATE items SET state = 'failed', lease_token = NULL, lease_expires = NULL, "
+                        "error = 'lease expired', updated = ? WHERE id = ?", (now, row["id"]))
+                    continue
+                token = uuid.uuid4().hex
+                db.execute(
+                    "UPDATE items SET state = 'leased', worker = ?, lease_token = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated = ? WHERE id = ?",
+                    (worker, token, now + self.lease_seconds, now, row["id"]))
+                item = dict(row)
+                item.update(state="leased", worker=worker, lease_token=token, attempts=row["attempts"] + 1)
+                return item
+
+    # a failing give-up hook (e.g. failed_tracks.txt on a read-only mount) must not abort the
+    # transaction: the expired item would stay first in line and take down every worker
+    def _give_up(self, on_give_up, item):
+        if not on_give_up:
+            return
+        try:
+            on_give_up(item)
+        except Exception as e:
+            print(Fore.RED + f"   ⚠ Could not record failure of item {item['id']}: {e}")
+
+    def _held(self, db, item):
+        row = db.execute("SELECT state, lease_token FROM items WHERE id = ?", (item["id"],)).fetchone()
+        return row is not None and row["state"] == "leased" and row["lease_token"] == item["lease_token"]
+
+    def renew(self, item):
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE items SET lease_expires = ?, updated = ? "
+                "WHERE id = ? AND state = 'leased' AND lease_token = ?",
+                (time.time() + self.lease_seconds, time.time(), item["id"], item["lease_token"]))
+            return cur.rowcount == 1
+
+    def claim_name(self, item, name, fallback):
+        """
+        Fix the file name an item publishes under. The first claim is stored on the row and every
+        retry reuses it; `fallback` is taken when another item in the same folder already owns `name`.
+        Returns the chosen name, or None if the lease was lost.
+        """
+        with self._tx() as db:
+            if not self._held(db, item):
+                return None
+            row = db.execute("SELECT final_name FROM items WHERE id = ?", (item["id"],)).fetchone()
+            chosen = row["final_name"]
+            if not chosen:
+                taken = db.execute(
+                    "SELECT 1 FROM items WHERE dest = ? AND final_name = ? AND id != ?",
+                    (item["dest"], name, item["id"])).fetchone()
+                chosen = fallback if taken else name
+                db.execute("UPDATE items SET final_name = ?, updated = ? WHERE id = ?",
+                           (chosen, time.time(), item["id"]))
+        item["final_name"] = chosen
+        return chosen
+
+    def commit(self, item, publish):
+        """
+        publish() puts already-copied files in place (renames only - it runs under the write
+        lock, so keep it quick) and returns their names. It only runs while we still hold the
+        lease, and the item is marked done in the same transaction. Returns False if the lease was lost.
+        """
+        with self._tx() as db:
+            if not self._held(db, item):
+                return False
+            files = publish()
+            db.execute(
+                "UPDATE items SET state = 'done', files = ?, lease_token = NULL, lease_expires = NULL, "
+                "error = NULL, updated = ? WHERE id = ?", (json.dumps(files), time.time(), item["id"]))
+            return True
+
+    def release(self, item, error, on_give_up=None):
+        """
+        Hand a failed item back for another worker (different host/IP) to try, or mark it
+        failed once max_attempts is reached. Returns the new state, or None if the lease was lost.
+        """
+        with self._tx() as db:
+            if not self._held(db, item):
+                return None
+            state = "failed" if item["attempts"] >= self.max_attempts else "queued"
+            if state == "failed":
+                self._give_up(on_give_up, item)
+            db.execute(
+                "UPDATE items SET state = ?, error = ?, lease_token = NULL, lease_expires = NULL, updated = ? "
+                "WHERE id = ?", (state, error, time.time(), item["id"]))
+            return state
+
+    def summary(self):
+        """Returns: {dest: {state: count}}"""
+        db = self._connect()
+        try:
+            out = {}
+            for row in db.execute("SELECT dest, state, COUNT(*) AS n FROM items GROUP BY dest, state ORDER BY dest"):
+                out.setdefault(row["dest"], {})[row["state"]] = row["n"]
+            return out
+        finally:
+            db.close()
+
+
+class QueueWorker:
+    """
+    Leases track items, downloads each one into its own staging area with a private engine,
+    then commits the result into the shared downloads tree (same layout and spotdl file names
+    as a normal run). The name an item publishes under is claimed on its queue row the first
+    time and reused by every retry, so a crash-retry overwrites or skips, never duplicates.
+    """
+    DB_RETRIES = 5
+
+    def __init__(self, work_queue, base="SpotiBeam_Downloads", staging="SpotiBeam_Staging", worker_id=None):
+        self.queue = work_queue
+        self.base = base
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.engine = SpotiBeam(base=os.path.join(staging, safe_name(self.worker_id)))
+
+    # sqlite lock timeouts on a busy shared mount are transient: back off and try again
+    def _db(self, fn, *args, **kwargs):
+        for attempt in range(1, self.DB_RETRIES + 1):
+            try:
+                return fn(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if attempt == self.DB_RETRIES:
+                    raise
+                print(Fore.YELLOW + f"   ⚠ Queue busy ({e}), retry {attempt}/{self.DB_RETRIES - 1}...")
+                time.sleep(min(30, 2 ** attempt))
+
+    # same places download() uses: tracks log into Tracks/ & Errors/, playlists/albums into their folder
+    def _dest(self, item):
+        return os.path.join(self.base, item["dest"])
+
+    def _failed_file(self, item):
+        if item["mode"] == "track":
+            return os.path.join(self.base, "Errors", "failed_tracks.txt")
+        return os.path.join(self._dest(item), "failed_tracks.txt")
+
+    # drop the item's old line from failed_tracks.txt and re-add it only if it failed again.
+    # Always called inside a queue transaction, so two workers never edit the file together.
+    # (best effort, like download()'s own failed file handling: an I/O error is logged, not raised)
+    def _update_failed_file(self, item, failed):
+        path = self._failed_file(item)
+        track = item["track"]
+        try:
+            lines = []
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as fh:
+                    lines = [line.rstrip("\n") for line in fh if line.strip()]
+            lines = [line for line in lines if line.strip() != track and not line.endswith(f" || {track}")]
+            if failed:
+                if item["mode"] == "track":
+                    lines.append(f"{datetime.now(timezone.utc).isoformat()} || {track}")
+                else:
+                    lines.append(track)
+            if lines:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w", encoding="utf-8") as fh:
+                    fh.write("\n".join(lines) + "\n")
+            elif os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            print(Fore.RED + f"   ⚠ Could not update {path}: {e}")
+
+    def _record_failure(self, item):
+        self._update_failed_file(item, failed=True)
+
+    # spotdl's default output name ("{artists} - {title}.mp3"), predicted from meta so the skip
+    # check finds files a normal/daemon run already put in the folder. Best effort: None if unknown.
+    def _spotdl_name(self, item):
+        track = item["track"]
+        if not track.startswith("http"):
+            return None
+        try:
+            meta = self.engine.spotdl_meta(track)
+        except Exception:
+            return None
+        artists = meta.get("artists") or []
+        if isinstance(artists, str):
+            artists = [artists]
+        if not (meta.get("name") and artists):
+            return None
+        return re.sub(r'[/\\?%*:|"<>]', "", f"{', '.join(artists)} - {meta['name']}") + ".mp3"
+
+    # same name with the spotify track id (or queue id) appended, for items whose name is taken
+    def _with_track_id(self, item, name):
+        m = re.search(r"/track/([A-Za-z0-9]+)", item["track"])
+        track_id = m.group(1) if m else f"item{item['id']}"
+        stem, ext = os.path.splitext(name)
+        return f"{stem} [{track_id}]{ext}"
+
+    def _in_dest(self, item, name):
+        path = os.path.join(self._dest(item), name)
+        return os.path.exists(path) and os.path.getsize(path) > 100 * 1024
+
+    def _staged_mp3(self):
+        staged = self.engine.tracks_folder
+        mp3s = [os.path.join(staged, f) for f in os.listdir(staged) if f.lower().endswith(".mp3")]
+        return max(mp3s, key=os.path.getmtime) if mp3s else None
+
+    # copy the staged mp3 (+ its .lrc) next to their final names under temp names.
+    # This is the slow part, so it runs before the commit and holds no queue lock.
+    # (staging may live on another filesystem than the shared mount)
+    def _copy_to_dest(self, item, mp3, final_name):
+        dest = self._dest(item)
+        moves = [(mp3, os.path.join(dest, final_name))]
+        staged_lyrics = os.path.join(self.engine.tracks_folder, "Lyrics")
+        lrcs = [os.path.join(staged_lyrics, f) for f in os.listdir(staged_lyrics) if f.endswith(".lrc")]
+        if lrcs:
+            same_stem = os.path.join(staged_lyrics, os.path.splitext(os.path.basename(mp3))[0] + ".lrc")
+            lrc = same_stem if same_stem in lrcs else max(lrcs, key=os.path.getmtime)
+            moves.append((lrc, os.path.join(dest, "Lyrics", os.path.splitext(final_name)[0] + ".lrc")))
+        pending = []
+        try:
+            for src, dst in moves:
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                tmp = os.path.join(os.path.dirname(dst), f".{os.path.basename(dst)}.{item['lease_token'][:8]}.tmp")
+                pending.append((tmp, dst))
+                shutil.copy2(src, tmp)
+        except Exception:
+            self._discard(pending)  # don't leave half-copied temp files in the shared tree
+            raise
+        return pending
+
+    # runs inside the commit transaction: renames only, so the write lock is held briefly
+    def _publish(self, item, pending):
+        for tmp, dst in pending:
+            if os.path.exists(tmp):  # already renamed by an earlier, rolled-back try
+                os.replace(tmp, dst)
+        self._update_failed_file(item, failed=False)
+        return [os.path.relpath(dst, self._dest(item)) for _, dst in pending]
+
+    def _discard(self, pending):
+        for tmp, _ in pending:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    # written only after a successful commit, so a retried item never logs twice
+    def _append_sources_log(self, item):
+        staged_log = os.path.join(self.engine.tracks_folder, "sources_used.txt")
+        if not os.path.exists(staged_log):
+            return
+        try:
+            with open(staged_log, "r", encoding="utf-8") as src, \
+                    open(os.path.join(self._dest(item), "sources_used.txt"), "a", encoding="utf-8") as out:
+                out.write(src.read())
+        except Exception:
+            pass
+
+    def _heartbeat(self, item, stop):
+        interval = max(1, self.queue.lease_seconds / 3)
+        wait = interval
+        while not stop.wait(wait):
+            try:
+                if not self.queue.renew(item):
+                    print(Fore.RED + f"   ⚠ Lost lease on item {item['id']}, another worker may take it over.")
+                    return
+                wait = interval
+            except sqlite3.OperationalError as e:
+                # keep the lease alive: retry soon instead of waiting a full interval
+                wait = min(interval, 5)
+                print(Fore.YELLOW + f"   ⚠ Lease renew for item {item['id']} failed ({e}), retrying in {wait:.0f}s.")
+
+    def run_one(self, item):
+        track, dest = item["track"], self._dest(item)
+        print(Fore.MAGENTA + f"\n📦 [{self.worker_id}] item {item['id']} (attempt {item['attempts']}) -> {dest}")
+        os.makedirs(dest, exist_ok=True)
+
+        # fresh staging for every item (also drops any stale Errors/failed_tracks.txt retry list)
+        shutil.rmtree(self.engine.base, ignore_errors=True)
+        self.engine.prepare_dirs()
+
+        # skip check: the name claimed by an earlier attempt, or spotdl's own name from a normal run
+        final_name = item.get("final_name")
+        if not final_name:
+            predicted = self._spotdl_name(item)
+            if predicted and self._in_dest(item, predicted):
+                final_name = self._db(self.queue.claim_name, item, predicted, self._with_track_id(item, predicted))
+                if final_name is None:
+                    print(Fore.YELLOW + f"   ⏭ Lease on item {item['id']} was lost.")
+                    return
+        if final_name and self._in_dest(item, final_name):
+            print(Fore.GREEN + f"   ✅ Already in shared tree as {final_name}, skipping.")
+            self._db(self.queue.commit, item, lambda: self._publish(item, []))
+            return
+
+        stop = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(item, stop), daemon=True)
+        beat.start()
+        try:
+            summary = self.engine.download(track, "track")
+        finally:
+            stop.set()
+            beat.join()
+
+        mp3 = self._staged_mp3() if summary["downloaded"] else None
+        if mp3:
+            if not final_name:
+                base = os.path.basename(mp3)
+                final_name = self._db(self.queue.claim_name, item, base, self._with_track_id(item, base))
+                if final_name is None:
+                    print(Fore.YELLOW + f"   ⏭ Lease on item {item['id']} was lost, result discarded.")
+                    return
+            pending = self._copy_to_dest(item, mp3, final_name)
+            try:
+                committed = self._db(self.queue.commit, item, lambda: self._publish(item, pending))
+            finally:
+                self._discard(pending)  # only leftovers of a commit that did not happen
+            if committed:
+                self._append_sources_log(item)
+                print(Fore.GREEN + f"   ✅ Committed item {item['id']} into {dest} as {final_name}")
+            else:
+                print(Fore.YELLOW + f"   ⏭ Lease on item {item['id']} was lost, result discarded.")
+        else:
+            state = self._db(self.queue.release, item, "all sources failed", on_give_up=self._record_failure)
+            if state == "queued":
+                print(Fore.YELLOW + f"   ↩ Item {item['id']} handed back for another worker.")
+            elif state == "failed":
+                print(Fore.RED + f"   ❌ Item {item['id']} failed after {item['attempts']} attempts.")
+
+    def run(self, drain=False, poll=5):
+        print(Fore.GREEN + f"👷 Worker {self.worker_id} online. Queue: {self.queue.path}")
+        backoff = 0
+        while True:
+            try:
+                item = self.queue.lease(self.worker_id, on_give_up=self._record_failure)
+            except sqlite3.OperationalError as e:
+                backoff = min(60, backoff * 2 or max(1, poll))
+                print(Fore.YELLOW + f"⚠ Queue busy ({e}), backing off {backoff}s.")
+                time.sleep(backoff)
+                continue
+            backoff = 0
+            if item is None:
+                if drain:
+                    print(Fore.CYAN + "📭 Queue drained, worker exiting.")
+                    return
+                time.sleep(poll)
+                continue
+            try:
+                self.run_one(item)
+            except Exception as e:
+                print(Fore.RED + f"   ❌ Item {item['id']} crashed: {e}")
+                try:
+                    self._db(self.queue.release, item, str(e), on_give_up=self._record_failure)
+                except Exception:
+                    pass
+
+
+def run_enqueue(work_queue, link, mode, base="SpotiBeam_Downloads"):
+    engine = SpotiBeam(base=base)
+    try:
+        tracks = engine.expand_tracks(link, mode, strict=True)
+    except Exception as e:
+        print(Fore.RED + f"❌ Could not expand {link} into tracks with spotdl meta: {e}")
+        print(Fore.RED + "   Nothing was queued. Is the playlist/album public?")
+        raise SystemExit(1)
+    folder = engine.route_folder(mode, link)
+    added = work_queue.enqueue(link, mode, os.path.relpath(folder, engine.base), tracks)
+    print(Fore.GREEN + f"📬 Queued {added} of {len(tracks)} track(s) for {folder}")
+
+def print_queue_status(work_queue):
+    print(Fore.CYAN + f"\n📊 Queue: {work_queue.path}")
+    for dest, states in work_queue.summary().items():
+        counts = ", ".join(f"{k}: {v}" for k, v in sorted(states.items()))
+        print(f"  {dest} -> {counts}")
+
 # -------------------------
 # CLI (synchronous)
 # -------------------------
 def main():
+    parser = argparse.ArgumentParser(description="SpotiBeam V7-Airborne")
+    parser.add_argument("--daemon", action="store_true", help="run as a long-lived local job server instead of the menu")
+    parser.add_argument("--host", default="127.0.0.1", help="daemon bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="daemon port (default: 8765)")
+    parser.add_argument("--workers", type=int, default=2, help="daemon worker threads (default: 2)")
+    parser.add_argument("--base", default="SpotiBeam_Downloads", help="downloads root (default: SpotiBeam_Downloads)")
+    parser.add_argument("--queue", default=None, help="shared SQLite work queue (default: <base>/.spotibeam_queue.sqlite)")
+    parser.add_argument("--enqueue", metavar="LINK", help="coordinator: expand LINK into track items on the queue")
+    parser.add_argument("--mode", choices=JOB_MODES, default="playlist", help="mode for --enqueue (default: playlist)")
+    parser.add_argument("--worker", action="store_true", help="lease and download items from the queue")
+    parser.add_argument("--worker-id", default=None, help="worker name (default: <hostname>-<pid>)")
+    parser.add_argument("--staging", default="SpotiBeam_Staging", help="worker staging root (default: SpotiBeam_Staging)")
+    parser.add_argument("--lease", type=int, default=600, help="lease length in seconds (default: 600)")
+    parser.add_argument("--drain", action="store_true", help="worker exits once the queue is empty")
+    parser.add_argument("--queue-status", action="store_true", help="print per-folder queue counts")
+    args = parser.parse_args()
+    if args.daemon:
+        run_daemon(args.host, args.port, args.workers, args.base)
+        return
+    if args.enqueue or args.worker or args.queue_status:
+        work_queue = WorkQueue(args.queue or os.path.join(args.base, ".spotibeam_queue.sqlite"), lease_seconds=args.lease)
+        if args.enqueue:
+            run_enqueue(work_queue, args.enqueue, args.mode, args.base)
+        if args.worker:
+            check_dependencies()
+            QueueWorker(work_queue, args.base, args.staging, args.worker_id).run(drain=args.drain)
+        if args.queue_status:
+            print_queue_status(work_queue)
+        return
+
     print_banner()
     random_greeting()
     check_dependencies()